@@ -1,12 +1,41 @@
 import os
 import time
+import asyncio
 import uvicorn
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+import aiohttp
+from anyio import to_thread
 from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from dotenv import load_dotenv
 from utils.process import Process
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
-app = FastAPI()
+load_dotenv()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Prepares the application before it starts serving requests, and releases its resources when it stops.
+    Description: Sizes the default executor of the event loop, which runs the blocking work of the jobs through
+                 asyncio.to_thread, so that long preprocessing jobs do not starve each other, and the thread pool of
+                 the synchronous endpoints. Opens the HTTP session shared by all the requests, which is closed with
+                 its pooled connections on shutdown.
+    """
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=64))
+    to_thread.current_default_thread_limiter().total_tokens = 64
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=100,
+                                                                   limit_per_host=16,
+                                                                   ttl_dns_cache=300,
+                                                                   keepalive_timeout=75)) as http:
+        app.state.http = http
+        yield
+
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",
@@ -22,16 +51,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-
-class PreprocessRequest(BaseModel):
-    session_id: int
-    interview_id: int
-
-
-class PredictRequest(BaseModel):
-    session_id: int
-    interview_id: int
-    model: str
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 
 @app.get("/health")
@@ -45,20 +65,17 @@ def health():
 
 
 @app.post("/preprocess")
-async def pre_process(request: PreprocessRequest):
+async def pre_process(session_id: int, interview_id: int):
     """
     Handles preprocessing of audio data.
-    Parameters: session_id (int): ID of the session.
-                interview_id (int): ID of the interview.
+    Parameters (query): session_id (int): ID of the session.
+                        interview_id (int): ID of the interview.
     Returns: Returns a JSON object with the status "ok" upon successful processing.
     """
-    session_id = request.session_id
-    interview_id = request.interview_id
-
     start_time = time.time()
 
-    process = Process(session_id, interview_id)
-    process.pre_process()
+    process = Process(session_id, interview_id, app.state.http)
+    await process.pre_process()
 
     print('Preprocessing finished in {} seconds'.format(time.time() - start_time))
 
@@ -66,21 +83,17 @@ async def pre_process(request: PreprocessRequest):
 
 
 @app.post("/predict")
-async def predict(request: PredictRequest):
+async def predict(session_id: int, interview_id: int, model: str):
     """
     Manages the complete processing and inference workflow.
-    Parameters: session_id (int): ID of the session.
-                interview_id (int): ID of the interview.
-                model (str): Name of the model to be used for video inference.
+    Parameters (query): session_id (int): ID of the session.
+                        interview_id (int): ID of the interview.
+                        model (str): Name of the model to be used for video inference.
     Returns: Returns a JSON object with the status "ok" upon successful processing.
     """
-    session_id = request.session_id
-    interview_id = request.interview_id
-    model = request.model
-
     start_time = time.time()
 
-    process = Process(session_id, interview_id, model)
+    process = Process(session_id, interview_id, app.state.http, model)
     await process.process_all()
 
     print('Processing finished in {} seconds'.format(time.time() - start_time))
@@ -90,4 +103,6 @@ async def predict(request: PredictRequest):
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host='0.0.0.0', port=port, reload=True)
+    workers = int(os.environ.get("WEB_CONCURRENCY", 2 * os.cpu_count() + 1))
+    uvicorn.run("app:app", host='0.0.0.0', port=port, loop="uvloop", http="httptools",
+                workers=workers, reload=os.environ.get("ENV") == "dev")
@@ -138,7 +138,7 @@ def deploy(c):  # noqa: ANN001, ANN201
 def test(c):  # noqa: ANN001, ANN201
     """Run unit tests"""
     with c.prefix(venv):
-        c.run("pytest test/test_app.py")
+        c.run("pytest test/test_app.py test/test_process.py")
 
 
 @task(pre=[require_venv_test])
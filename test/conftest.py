@@ -12,18 +12,111 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import flask
-from flask.testing import FlaskClient
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
 import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import app as fastapi_app
+from utils.utils import Utils
+
+
+class FakeQuery:
+    """
+    Records the calls made on a Supabase table, and answers them without a database.
+    """
+    def __init__(self, supabase: 'FakeSupabase', table: str) -> None:
+        self.supabase = supabase
+        self.table = table
+        self.rows = None
+
+    def select(self, *columns: str) -> 'FakeQuery':
+        return self
+
+    def single(self) -> 'FakeQuery':
+        return self
+
+    def eq(self, column: str, value: Any) -> 'FakeQuery':
+        self.supabase.calls.append(('eq', self.table, column, value))
+        return self
+
+    def update(self, values: Dict[str, Any]) -> 'FakeQuery':
+        self.supabase.calls.append(('update', self.table, values))
+        return self
+
+    def delete(self) -> 'FakeQuery':
+        self.supabase.calls.append(('delete', self.table))
+        return self
+
+    def insert(self, rows: List[Dict[str, Any]]) -> 'FakeQuery':
+        self.supabase.calls.append(('insert', self.table, rows))
+        self.rows = rows
+        return self
+
+    def execute(self) -> SimpleNamespace:
+        if self.rows is not None:
+            self.supabase.inserts += 1
+            if self.supabase.inserts == self.supabase.fail_on_insert:
+                raise Exception('Insert failed')
+            return SimpleNamespace(data=self.rows)
+        return SimpleNamespace(data={'user_id': 'user'})
 
-from app import app as flask_app
+
+class FakeBucket:
+    """
+    Keeps the objects of a Supabase storage bucket in memory.
+    """
+    def __init__(self) -> None:
+        self.objects = {}
+
+    def list(self) -> List[str]:
+        return list(self.objects)
+
+    def upload(self, file: Any, path: str, file_options: Dict[str, str]) -> None:
+        if path in self.objects and file_options.get('x-upsert') != 'true':
+            raise Exception('The resource already exists')
+        self.objects[path] = file if isinstance(file, bytes) else file.read()
+
+    def download(self, path: str) -> bytes:
+        if path not in self.objects:
+            raise Exception('Object not found')
+        return self.objects[path]
+
+
+class FakeSupabase:
+    """
+    Supabase client recording the queries made on its tables and keeping its storage in memory.
+    Attributes:
+        calls (list): The queries made on the tables, in order.
+        inserts (int): Number of inserts executed so far.
+        fail_on_insert (int | None): Position of the insert that fails, starting at 1, or None if none fails.
+    """
+    def __init__(self) -> None:
+        self.calls = []
+        self.inserts = 0
+        self.fail_on_insert = None
+        self.bucket = FakeBucket()
+        self.storage = SimpleNamespace(from_=lambda bucket_name: self.bucket)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+
+@pytest.fixture
+def app() -> FastAPI:
+    yield fastapi_app
 
 
 @pytest.fixture
-def app() -> None:
-    yield flask_app
+def client(app: FastAPI) -> TestClient:
+    return TestClient(app)
 
 
 @pytest.fixture
-def client(app: flask.app.Flask) -> FlaskClient:
-    return app.test_client()
+def supabase(monkeypatch: pytest.MonkeyPatch) -> FakeSupabase:
+    fake = FakeSupabase()
+    monkeypatch.setattr(Utils, '_client', fake)
+    monkeypatch.setattr(Utils, '_connection', fake.bucket)
+    return fake
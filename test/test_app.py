@@ -12,15 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import flask
-from flask.testing import FlaskClient
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
 
 
-def test_get_index(app: flask.app.Flask, client: FlaskClient) -> None:
-    res = client.get("/")
+def test_get_health(app: FastAPI, client: TestClient) -> None:
+    res = client.get("/health")
     assert res.status_code == 200
+    assert res.json() == {"status": "ok"}
 
 
-def test_post_index(app: flask.app.Flask, client: FlaskClient) -> None:
-    res = client.post("/")
+def test_post_health(app: FastAPI, client: TestClient) -> None:
+    res = client.post("/health")
     assert res.status_code == 405
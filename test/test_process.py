@@ -0,0 +1,169 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Callable, List
+
+import aiohttp
+import numpy as np
+import orjson
+import pandas as pd
+import pytest
+
+from utils import utils
+from utils.process import Process
+from utils.utils import Utils
+
+from .conftest import FakeSupabase
+
+
+class FakeResponse:
+    """
+    Response of the fake session, used as an async context manager like aiohttp's.
+    """
+    def __init__(self, status: int, body: bytes) -> None:
+        self.status = status
+        self.body = body
+
+    async def read(self) -> bytes:
+        return self.body
+
+    async def __aenter__(self) -> 'FakeResponse':
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> bool:
+        return False
+
+
+class FakeSession:
+    """
+    HTTP session answering every post with the response built by a callback from the position of the post.
+    """
+    def __init__(self, respond: Callable[[int], FakeResponse]) -> None:
+        self.respond = respond
+        self.posts = []
+
+    def post(self, url: str, **kwargs: Any) -> FakeResponse:
+        self.posts.append(url)
+        return self.respond(len(self.posts) - 1)
+
+
+def diarization_segment(start: float, stop: float, speaker: int) -> dict:
+    return {'startTime': start, 'stopTime': stop, 'speaker': 'SPEAKER_{:02d}'.format(speaker)}
+
+
+def diarize(supabase: FakeSupabase, tmp_path: Path, segments: List[dict]) -> pd.DataFrame:
+    audio_file = tmp_path / 'raw.mp3'
+    audio_file.write_bytes(b'audio')
+    session = FakeSession(lambda _: FakeResponse(200, orjson.dumps({'diarization': segments})))
+    process = Process(1, 2, session)
+    return asyncio.run(process._Process__diarize(str(audio_file)))
+
+
+def test_diarize_merges_short_gaps_and_drops_short_segments(supabase: FakeSupabase, tmp_path: Path) -> None:
+    df = diarize(supabase, tmp_path, [
+        diarization_segment(0.0, 0.6, 1),
+        diarization_segment(0.7, 1.5, 1),  # 100 ms after the previous segment of the same speaker, merged
+        diarization_segment(1.6, 2.0, 2),  # 400 ms long, dropped
+        diarization_segment(2.0, 3.5, 1),  # follows another speaker, not merged
+        diarization_segment(4.0, 5.2, 2),
+        diarization_segment(5.6, 6.0, 2),  # 400 ms after the previous segment, not merged and dropped
+    ])
+
+    assert df[['start', 'end', 'speaker']].values.tolist() == [[0, 1500, 0], [2000, 3500, 0], [4000, 5200, 1]]
+
+
+def test_diarize_relabels_speakers_to_0_and_1(supabase: FakeSupabase, tmp_path: Path) -> None:
+    df = diarize(supabase, tmp_path, [
+        diarization_segment(0.0, 1.0, 3),
+        diarization_segment(1.0, 2.0, 5),
+        diarization_segment(2.0, 3.0, 3),
+    ])
+
+    assert df['speaker'].tolist() == [0, 1, 0]
+
+
+def speech_to_text(supabase: FakeSupabase, respond: Callable[[int], FakeResponse]) -> tuple:
+    sample_rate = 16000
+    pcm = np.zeros(3 * sample_rate, dtype=np.int16)
+    pcm[:sample_rate] = 1000
+    pcm[2 * sample_rate:] = -1000
+    diarization = pd.DataFrame({'start': [0, 1000, 2000, 2000], 'end': [1000, 2000, 2000, 3000], 'speaker': 0})
+
+    session = FakeSession(respond)
+    process = Process(1, 2, session)
+    process.stt_concurrency = 1
+    results, failed = asyncio.run(process._Process__speech_to_text(pcm, sample_rate, diarization))
+    return results, failed, session
+
+
+def test_speech_to_text_skips_silent_and_empty_segments(supabase: FakeSupabase) -> None:
+    results, failed, session = speech_to_text(supabase, lambda i: FakeResponse(200, b'"text"'))
+
+    assert len(session.posts) == 2
+    assert results['text'].tolist() == ['text', pd.NA, pd.NA, 'text']
+    assert failed == 0
+
+
+def test_speech_to_text_counts_failed_segments(supabase: FakeSupabase) -> None:
+    def respond(i: int) -> FakeResponse:
+        if i == 0:
+            return FakeResponse(500, b'')
+        raise aiohttp.ClientConnectionError('Connection refused')
+
+    results, failed, session = speech_to_text(supabase, respond)
+
+    assert len(session.posts) == 2
+    assert results['text'].isna().all()
+    assert failed == 2
+
+
+def test_cache_key_depends_on_audio_and_settings(supabase: FakeSupabase, tmp_path: Path) -> None:
+    audio_file = tmp_path / 'raw.mp3'
+    audio_file.write_bytes(b'audio')
+    other_file = tmp_path / 'other.mp3'
+    other_file.write_bytes(b'other audio')
+    process = Process(1, 2, None)
+
+    key = process._Process__cache_key(str(audio_file))
+    assert process._Process__cache_key(str(audio_file)) == key
+    assert process._Process__cache_key(str(other_file)) != key
+
+    process.min_segment += 1
+    assert process._Process__cache_key(str(audio_file)) != key
+
+
+def test_cached_results_round_trip(supabase: FakeSupabase) -> None:
+    utils_ = Utils(1, 2)
+    results = pd.DataFrame({'start': [0, 2000], 'end': [1500, 3500], 'speaker': [0, 1], 'text': ['a', None]})
+
+    assert utils_.load_cached_results('key') is None
+    utils_.save_cached_results('key', results)
+
+    cached = utils_.load_cached_results('key')
+    assert cached[['start', 'end', 'speaker']].values.tolist() == [[0, 1500, 0], [2000, 3500, 1]]
+    assert cached['text'].tolist() == ['a', None]
+
+
+def results(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({'start': range(rows), 'end': range(1, rows + 1), 'speaker': 0, 'text': 'text'})
+
+
+def test_save_results_replaces_previous_results_in_batches(supabase: FakeSupabase,
+                                                           monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(utils._CONFIG['SUPABASE'], 'InsertBatchSize', '2')
+
+    Utils(1, 2).save_results_to_bd(results(5))
+
+    writes = [call for call in supabase.calls if call[0] in ('delete', 'insert')]
+    assert writes[0] == ('delete', 'results')
+    assert ('eq', 'results', 'interview_id', 2) in supabase.calls
+    assert [len(call[2]) for call in writes[1:]] == [2, 2, 1]
+    assert [row['start'] for call in writes[1:] for row in call[2]] == [0, 1, 2, 3, 4]
+
+
+def test_save_results_raises_when_a_batch_fails(supabase: FakeSupabase, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(utils._CONFIG['SUPABASE'], 'InsertBatchSize', '2')
+    supabase.fail_on_insert = 2
+
+    with pytest.raises(Exception, match='Insert failed'):
+        Utils(1, 2).save_results_to_bd(results(5))
+    assert supabase.inserts == 2
@@ -14,12 +14,12 @@
 
 import os
 
-import flask
-from flask.testing import FlaskClient
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
 import requests
 
 
-def test_system(app: flask.app.Flask, client: FlaskClient) -> None:
+def test_system(app: FastAPI, client: TestClient) -> None:
 
     BASE_URL = os.environ.get("BASE_URL")
     assert BASE_URL, "Cloud Run service URL not found"
@@ -1,14 +1,16 @@
 import av
 import os
 import io
+import wave
+import hashlib
+import tempfile
 import asyncio
 import aiohttp
-import requests
+import orjson
+import numpy as np
 import pandas as pd
 from typing import List
 from .utils import Utils
-from pydub import AudioSegment
-from dotenv import load_dotenv
 from fastapi import HTTPException
 from dataclasses import dataclass
 
@@ -21,63 +23,151 @@ class ApiResponse:
 
 
 class Process:
-    def __init__(self, session_id: int, interview_id: int, model_type: str = None):
-        load_dotenv()
+    def __init__(self, session_id: int, interview_id: int, http: aiohttp.ClientSession, model_type: str = None):
         self.increasing_tqdm = False
         self.session_id = session_id
         self.interview_id = interview_id
         self.utils = Utils(session_id, interview_id)
+        # Pooled HTTP session shared by every request handled by the application
+        self.session = http
         self.params = {
             'session_id': self.session_id,
             'interview_id': self.interview_id,
             'model_type': model_type
         }
 
-    def __speech_to_text(self, audio_bytes: bytes, diarization: pd.DataFrame) -> pd.DataFrame:
+        # Settings read once instead of on every speech-to-text, diarization and analysis request
+        self.whisper_headers = {'Authorization': 'Bearer {}'.format(os.environ.get('WHISPER_API_KEY'))}
+        self.env = os.environ.get('ENV')
+        self.api_audio = os.environ.get('API_AUDIO_IP')
+        self.api_text = os.environ.get('API_TEXT_IP')
+        self.api_video = os.environ.get('API_VIDEO_IP')
+        self.stt_url = self.utils.config['SPEECHTOTEXT']['STT_API_URL']
+        self.stt_model = self.utils.config['SPEECHTOTEXT']['ModelId']
+        self.diarization_url = self.utils.config['DIARIZATION']['DIARIZATION_API_URL']
+        self.language = self.utils.config['GENERAL']['Language']
+        self.merge_gap = int(self.utils.config['DIARIZATION']['MergeGapMs'])
+        self.min_segment = int(self.utils.config['DIARIZATION']['MinSegmentMs'])
+        self.silence_threshold = int(self.utils.config['SPEECHTOTEXT']['SilenceThreshold'])
+        self.stt_concurrency = int(self.utils.config['SPEECHTOTEXT']['MaxConcurrentRequests'])
+        # Bound the time without any data from the API rather than the total, which would also count the time spent
+        # waiting for one of the pooled connections shared with the other jobs
+        self.stt_timeout = aiohttp.ClientTimeout(total=None, sock_connect=30,
+                                                 sock_read=int(self.utils.config['SPEECHTOTEXT']['Timeout']))
+        self.inference_timeout = aiohttp.ClientTimeout(total=int(self.utils.config['INFERENCE']['Timeout']),
+                                                       connect=int(self.utils.config['INFERENCE']['ConnectTimeout']))
+
+    def __decode_audio(self, audio_file: str) -> tuple:
+        """
+        Decodes an audio file in a single pass into 16 kHz mono 16-bit PCM, the format used by Whisper models.
+        Parameters:
+            audio_file (str): Path of the local audio file.
+        Returns:
+            tuple: The samples as an int16 np.ndarray, and their sample rate.
+        """
+        sample_rate = 16000
+        resampler = av.AudioResampler(format='s16', layout='mono', rate=sample_rate)
+        chunks = []
+        with av.open(audio_file) as container:
+            for frame in container.decode(audio=0):
+                chunks.extend(resampled.to_ndarray() for resampled in resampler.resample(frame))
+        chunks.extend(resampled.to_ndarray() for resampled in resampler.resample(None))
+        return np.concatenate(chunks, axis=1)[0], sample_rate
+
+    async def __transcribe_segment(self, sem: asyncio.Semaphore, data: dict, index: int, samples: np.ndarray,
+                                   sample_rate: int) -> tuple:
+        """
+        Sends a single audio segment to the speech-to-text API.
+        The WAV buffer is only built once a slot is free, so at most MaxConcurrentRequests segments are copied at once.
+        Parameters:
+            sem (asyncio.Semaphore): Semaphore bounding the number of concurrent requests.
+            data (dict): Form fields sent along with the audio segment.
+            index (int): Position of the diarization row the segment belongs to.
+            samples (np.ndarray): View on the decoded samples of the segment.
+            sample_rate (int): The sample rate of the samples.
+        Returns:
+            tuple: The diarization position and the transcribed text, or None if the request failed.
+                   A failed segment does not abort the others.
+        """
+        async with sem:
+            segment = io.BytesIO()
+            with wave.open(segment, 'wb') as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(samples.itemsize)
+                wav.setframerate(sample_rate)
+                wav.writeframes(samples)
+            segment.seek(0)
+
+            # The WAV buffer is streamed as is into the multipart body
+            form = aiohttp.FormData(data)
+            form.add_field('file', segment, filename='segment.wav', content_type='audio/wav')
+            try:
+                async with self.session.post(self.stt_url, headers=self.whisper_headers, data=form,
+                                             timeout=self.stt_timeout) as response:
+                    if response.status == 200:
+                        return index, orjson.loads(await response.read())
+                    self.utils.log.error('Speech to text of segment {} failed with status {}'.
+                                         format(index, response.status))
+                    return index, None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.utils.log.error('Speech to text of segment {} failed: {!r}'.format(index, e))
+                return index, None
+
+    async def __speech_to_text(self, pcm: np.ndarray, sample_rate: int, diarization: pd.DataFrame) -> tuple:
         """
         Converts speech segments from an audio file into text using an external API.
+        The segments are sent concurrently, with at most MaxConcurrentRequests requests in flight at a time.
         Parameters:
-            audio_bytes (bytes): The audio file content as bytes.
+            pcm (np.ndarray): The decoded mono 16-bit samples of the audio file.
+            sample_rate (int): The sample rate of the samples.
             diarization (pd.DataFrame): DataFrame containing diarization data with start and end times.
         Returns:
-            pd.DataFrame: Updated DataFrame with the text obtained from speech-to-text conversion.
+            tuple: Updated DataFrame with the text obtained from speech-to-text conversion, and the number of segments
+                   sent to the API that could not be transcribed. Silent segments are not sent and not counted.
         Raises:
             Exception: Raises an exception if speech-to-text conversion fails.
         """
         try:
             self.utils.log.info('Starting speech to text')
-            audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format="mp3")
-            headers = {'Authorization': 'Bearer {}'.format(os.environ.get('WHISPER_API_KEY'))}
-            data = {'model': self.utils.config['SPEECHTOTEXT']['ModelId'],
+            data = {'model': self.stt_model,
                     'language': 'fr',
                     'response_format': 'text'
                     }
-
-            for row in diarization.itertuples():
-                audio_segment = audio[row.start:row.end]
-                audio_segment_bytes = io.BytesIO()
-                audio_segment.export(audio_segment_bytes, format="mp3")
-                audio_segment_bytes.seek(0)
-
-                file = {'file': audio_segment_bytes}
-                response = requests.post(self.utils.config['SPEECHTOTEXT']['STT_API_URL'],
-                                         headers=headers,
-                                         files=file,
-                                         data=data)
-                if response.status_code == 200:
-                    diarization.at[row.Index, 'text'] = response.json()
+            sem = asyncio.Semaphore(self.stt_concurrency)
+
+            # Sample offsets of every segment, computed on 64-bit integers so long interviews do not overflow
+            starts = diarization['start'].to_numpy(dtype=np.int64) * sample_rate // 1000
+            ends = diarization['end'].to_numpy(dtype=np.int64) * sample_rate // 1000
+
+            # Slice the decoded PCM directly instead of re-encoding every segment to mp3
+            tasks = []
+            for i, (start, end) in enumerate(zip(starts, ends)):
+                # Empty and silent segments are left without text rather than sent to the API
+                if end <= start or np.abs(pcm[start:end]).mean() < self.silence_threshold:
+                    continue
+
+                # Pass a view on the samples, the segment is only copied into a WAV buffer when it is sent
+                tasks.append(self.__transcribe_segment(sem, data, i, pcm[start:end], sample_rate))
+
+            # Fill a plain list and write the whole column at once
+            texts = [None] * len(diarization)
+            failed = 0
+            for i, text in await asyncio.gather(*tasks):
+                texts[i] = text
+                failed += text is None
+            diarization['text'] = pd.array(texts, dtype='string')
 
             self.utils.log.info('Speech to text done')
-            return diarization
+            return diarization, failed
         except Exception as e:
             self.utils.log.error('An error occurred: {}'.format(e))
             raise e
 
-    def __diarize(self, audio: bytes) -> pd.DataFrame:
+    async def __diarize(self, audio_file: str) -> pd.DataFrame:
         """
         Performs speaker diarization on an audio file to identify different speakers and their speech segments.
         Parameters:
-            audio (bytes): The audio file content as bytes.
+            audio_file (str): Path of the local audio file, streamed to the diarization API.
         Returns:
             pd.DataFrame: A DataFrame containing columns for start and end times, and speaker labels.
         Raises:
@@ -85,27 +175,35 @@ class Process:
         """
         try:
             self.utils.log.info('Starting diarization')
-            file = {'file': io.BytesIO(audio)}
-            data = {'num_speakers': '2',
-                    'language': self.utils.config['GENERAL']['Language'],
-                    'diarization': 'true',
-                    'task': 'transcribe',
-                    }
-            headers = {'Authorization': 'Bearer {}'.format(os.environ.get('WHISPER_API_KEY'))}
-
-            response = requests.post(self.utils.config['DIARIZATION']['DIARIZATION_API_URL'],
-                                     headers=headers,
-                                     data=data,
-                                     files=file)
-            df = pd.DataFrame(response.json()['diarization'])
+            form = aiohttp.FormData({'num_speakers': '2',
+                                     'language': self.language,
+                                     'diarization': 'true',
+                                     'task': 'transcribe',
+                                     })
+
+            # Diarizing a whole interview can outlast the default 5 minutes timeout of the session,
+            # only the connection is bounded so that an unreachable API does not hang the request
+            with open(audio_file, 'rb') as file:
+                form.add_field('file', file, filename='file')
+                async with self.session.post(self.diarization_url,
+                                             headers=self.whisper_headers,
+                                             data=form,
+                                             timeout=aiohttp.ClientTimeout(total=None, sock_connect=30)) as response:
+                    df = pd.DataFrame(orjson.loads(await response.read())['diarization'])
 
             df.rename(columns={'startTime': 'start', 'stopTime': 'end'}, inplace=True)
-            df['start'] = df['start'].map(lambda x: int(x * 1000))
-            df['end'] = df['end'].map(lambda x: int(x * 1000))
-            df['speaker'] = df['speaker'].map(lambda x: int(x.split('_')[1]))
+            df['start'] = (df['start'].to_numpy(dtype=np.float64) * 1000).astype(np.int32)
+            df['end'] = (df['end'].to_numpy(dtype=np.float64) * 1000).astype(np.int32)
+            df['speaker'] = pd.to_numeric(df['speaker'].str.rsplit('_', n=1).str[-1], downcast='integer')
 
-            # Keep only segments equal or longer than 1 second
-            df_filtered = df[(df['end'] - df['start']) >= 1000]
+            # Merge consecutive segments of the same speaker separated by a short gap
+            new_turn = (df['speaker'] != df['speaker'].shift()) | (df['start'] - df['end'].shift() >= self.merge_gap)
+            df = df.groupby(new_turn.cumsum()).agg(start=('start', 'min'),
+                                                   end=('end', 'max'),
+                                                   speaker=('speaker', 'first')).reset_index(drop=True)
+
+            # Keep only segments equal or longer than the minimum duration, shorter ones are not sent to speech to text
+            df_filtered = df[(df['end'] - df['start']) >= self.min_segment].copy()
 
             # Set the minimum speaker label to 0
             min_speaker = df_filtered['speaker'].min()
@@ -122,44 +220,84 @@ class Process:
             self.utils.log.error('An error occurred: {}'.format(e))
             raise e
 
-    def __extract_audio(self, video_path, video_name, audio_path) -> bytes:
-        video_bytes = self.utils.open_input_file(video_path, video_name)
-
-        # Create an in-memory binary stream from the byte array
-        container = av.open(io.BytesIO(video_bytes))
-
-        # Initialize an in-memory buffer to store the extracted audio
-        audio_buffer = io.BytesIO()
-
-        # Extract the audio stream
-        audio_stream = next(s for s in container.streams if s.type == 'audio')
-
-        # Create an output container for audio
-        output_container = av.open(audio_buffer, mode='w', format='mp3')
-
-        # Add a stream to the output container
-        output_audio_stream = output_container.add_stream('mp3')
-
-        # Process the audio frames and write them to the output container
-        for frame in container.decode(audio_stream):
-            packet = output_audio_stream.encode(frame)
-            if packet:
-                output_container.mux(packet)
+    def __extract_audio(self, video_path, video_name) -> str:
+        """
+        Extracts the audio track of the interview video into a local mp3 file.
+        Parameters:
+            video_path (str): Path of the video in the S3 bucket.
+            video_name (str): Name of the video file.
+        Returns:
+            str: Path of the local temporary mp3 file, which the caller is responsible for deleting.
+        """
+        video_file = self.utils.open_input_file_to_tempfile(video_path, video_name)
+        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as f:
+            audio_file = f.name
 
-        # Finalize the audio container
-        output_container.close()
+        try:
+            # Open the video from disk rather than from an in-memory copy, and create an output container for audio.
+            # Both containers are closed even if the extraction fails, closing the output one finalizes the mp3
+            with av.open(video_file) as container, av.open(audio_file, mode='w', format='mp3') as output_container:
+                # Extract the audio stream
+                audio_stream = container.streams.audio[0]
+
+                if audio_stream.codec_context.name in ('mp3', 'mp3float'):
+                    # The track is already mp3, copy its packets as they are instead of re-encoding them
+                    output_audio_stream = output_container.add_stream(template=audio_stream)
+                    for packet in container.demux(audio_stream):
+                        # Skip the empty packets used by the demuxer to signal the end of the stream
+                        if packet.dts is None:
+                            continue
+                        packet.stream = output_audio_stream
+                        output_container.mux(packet)
+                else:
+                    # Add a stream to the output container, decoding and encoding on as many threads as needed
+                    audio_stream.thread_type = 'AUTO'
+                    output_audio_stream = output_container.add_stream('mp3')
+                    output_audio_stream.thread_count = 0
+                    output_audio_stream.thread_type = 'AUTO'
+
+                    # Process the audio frames and write them to the output container
+                    for frame in container.decode(audio_stream):
+                        output_container.mux(output_audio_stream.encode(frame))
+
+                    # Flush the frames still buffered in the encoder
+                    output_container.mux(output_audio_stream.encode(None))
+        except Exception as e:
+            os.remove(audio_file)
+            raise e
+        finally:
+            os.remove(video_file)
 
-        # Get the extracted audio bytes
-        audio_bytes = audio_buffer.getvalue()
-        audio_buffer.close()
+        return audio_file
 
-        self.utils.supabase.storage.from_(self.utils.bucket_name).upload(file=audio_bytes,
-                                                                         path=audio_path,
-                                                                         file_options={"content-type": "audio/mpeg"})
+    def __upload_audio(self, audio_file: str, audio_path: str) -> None:
+        """
+        Uploads the extracted audio to the S3 bucket, replacing the audio of a previous run of the same interview.
+        Parameters:
+            audio_file (str): Path of the local mp3 file.
+            audio_path (str): Path of the extracted audio in the S3 bucket.
+        """
+        with open(audio_file, 'rb') as file:
+            self.utils.supabase.storage.from_(self.utils.bucket_name).upload(file=file,
+                                                                             path=audio_path,
+                                                                             file_options={"content-type": "audio/mpeg",
+                                                                                           "x-upsert": "true"})
 
-        return audio_bytes
+    def __cache_key(self, audio_file: str) -> str:
+        """
+        Computes the key under which the transcript of an audio file is cached.
+        Parameters:
+            audio_file (str): Path of the local audio file.
+        Returns:
+            str: A hash of the audio content and of the settings the diarization and speech-to-text results depend on.
+        """
+        with open(audio_file, 'rb') as file:
+            digest = hashlib.file_digest(file, 'blake2b')
+        digest.update('{}|{}|{}|{}|{}'.format(self.stt_model, self.language, self.merge_gap, self.min_segment,
+                                              self.silence_threshold).encode())
+        return digest.hexdigest()
 
-    def pre_process(self) -> None:
+    async def pre_process(self) -> None:
         """
         Handles the preprocessing steps including diarization and speech-to-text
         for the given session and interview IDs.
@@ -170,6 +308,8 @@ class Process:
                                                                       self.interview_id))
         self.utils.log.info('Program started => Session: {} | Interview: {}'.format(self.session_id,
                                                                                     self.interview_id))
+        audio_file = None
+        upload = None
         try:
             video_name = self.utils.config['GENERAL']['Videoname']
             audio_name = self.utils.config['GENERAL']['Audioname']
@@ -177,29 +317,63 @@ class Process:
             video_path = '{}/{}'.format(s3_path, video_name)
             audio_path = '{}/{}'.format(s3_path, audio_name)
 
-            audio_file = self.__extract_audio(video_path, video_name, audio_path)
-
-            # Diarize and split the audio file
-            diarization = self.__diarize(audio_file)
-            print('Diarization done')
+            # Extracting the audio decodes the whole video, keep it off the event loop
+            audio_file = await asyncio.to_thread(self.__extract_audio, video_path, video_name)
+
+            # Upload the audio in the background while its transcript is looked up or computed
+            upload = asyncio.create_task(asyncio.to_thread(self.__upload_audio, audio_file, audio_path))
+
+            # Interviews are often processed again, reuse the transcript of an identical audio file if there is one
+            cache_key = await asyncio.to_thread(self.__cache_key, audio_file)
+            results = await asyncio.to_thread(self.utils.load_cached_results, cache_key)
+            if results is None:
+                # Diarize the audio file, decoding it for speech to text while the diarization API is working.
+                # Both are awaited even if one fails, so neither is still reading the audio file when it is deleted
+                diarization, decoded = await asyncio.gather(self.__diarize(audio_file),
+                                                            asyncio.to_thread(self.__decode_audio, audio_file),
+                                                            return_exceptions=True)
+                for result in (diarization, decoded):
+                    if isinstance(result, BaseException):
+                        raise result
+                pcm, sample_rate = decoded
+                print('Diarization done')
+
+                results, failed = await self.__speech_to_text(pcm, sample_rate, diarization)
+                print('Speech to text done')
+
+                # Only cache complete transcripts, otherwise the failed segments could never be transcribed again
+                if failed:
+                    self.utils.log.error('{} segments could not be transcribed, the results are not cached'.
+                                         format(failed))
+                else:
+                    await asyncio.to_thread(self.utils.save_cached_results, cache_key, results)
+            else:
+                print('Diarization and speech to text results found in cache')
 
-            results = self.__speech_to_text(audio_file, diarization)
-            print('Speech to text done')
+            await upload
 
-            self.utils.save_results_to_bd(results)
-            self.utils.update_bool_db('diarization_ok', True)
+            await asyncio.to_thread(self.utils.save_results_to_bd, results)
+            await asyncio.to_thread(self.utils.update_bool_db, 'diarization_ok', True)
             print('Results saved to database')
         except Exception as e:
             print('An error occurred: {}'.format(e))
             self.utils.log.error('An error occurred: {}'.format(e))
             raise e
         finally:
-            self.utils.end_logs('preprocessing')
-            self.utils.__del__()
+            # The audio file can only be deleted once the background upload is done reading it
+            if upload is not None:
+                upload_error = (await asyncio.gather(upload, return_exceptions=True))[0]
+                if isinstance(upload_error, BaseException):
+                    self.utils.log.error('Error uploading the file {} to the S3 bucket : {}.'.
+                                         format(audio_name, upload_error))
+            if audio_file is not None:
+                os.remove(audio_file)
+            await asyncio.to_thread(self.utils.end_logs, 'preprocessing')
 
     async def __fetch(self, session, url, identifier) -> ApiResponse:
         """
         Asynchronously fetches data from a given URL using aiohttp session.
+        A call that does not complete within the inference timeout is reported as an error.
         Parameters:
             session (aiohttp.ClientSession): The session for making HTTP requests.
             url (str): The URL to which the request is to be sent.
@@ -208,12 +382,15 @@ class Process:
             ApiResponse: An object containing the identifier, status, and content of the response.
         """
         try:
-            async with session.post(url, params=self.params) as response:
+            async with session.post(url, params=self.params, timeout=self.inference_timeout) as response:
                 response.raise_for_status()  # Raise HTTPError for bad responses (4xx and 5xx)
                 content = await response.text()
                 return ApiResponse(identifier=identifier, status='ok', content=content)
         except aiohttp.ClientError as e:
             return ApiResponse(identifier=identifier, status='error', content=str(e))
+        except asyncio.TimeoutError:
+            return ApiResponse(identifier=identifier, status='error', content='Timed out after {} seconds'.
+                               format(self.inference_timeout.total))
 
     async def __call_apis(self, urls: List[str], identifiers: List[str]) -> List[ApiResponse]:
         """
@@ -224,10 +401,9 @@ class Process:
         Returns:
             List[ApiResponse]: A list of ApiResponse objects containing the responses from each API call.
         """
-        async with aiohttp.ClientSession() as session:
-            tasks = [self.__fetch(session, url, identifier) for url, identifier in zip(urls, identifiers)]
-            responses = await asyncio.gather(*tasks, return_exceptions=True)
-            return responses
+        tasks = [self.__fetch(self.session, url, identifier) for url, identifier in zip(urls, identifiers)]
+        responses = await asyncio.gather(*tasks, return_exceptions=True)
+        return responses
 
     async def process_all(self):
         """
@@ -240,36 +416,39 @@ class Process:
         self.utils.log.info('Inference started => Session: {} | Interview: {}'.format(self.session_id,
                                                                                       self.interview_id))
         try:
-            if os.environ.get('ENV') == "dev":
+            if self.env == "dev":
                 urls = [
-                    'http://{}:8001/analyse_audio'.format(os.environ.get('API_AUDIO_IP')),
-                    'http://{}:8002/analyse_text'.format(os.environ.get('API_TEXT_IP')),
-                    'http://{}:8003/analyse_video'.format(os.environ.get('API_VIDEO_IP'))
+                    'http://{}:8001/analyse_audio'.format(self.api_audio),
+                    'http://{}:8002/analyse_text'.format(self.api_text),
+                    'http://{}:8003/analyse_video'.format(self.api_video)
                 ]
-            elif os.environ.get('ENV') == "prod":
+            elif self.env == "prod":
                 urls = [
-                    'https://{}/analyse_audio'.format(os.environ.get('API_AUDIO_IP')),
-                    'https://{}/analyse_text'.format(os.environ.get('API_TEXT_IP')),
-                    'https://{}/analyse_video'.format(os.environ.get('API_VIDEO_IP'))
+                    'https://{}/analyse_audio'.format(self.api_audio),
+                    'https://{}/analyse_text'.format(self.api_text),
+                    'https://{}/analyse_video'.format(self.api_video)
                 ]
             else:
-                raise Exception(f"Unknown ENV environnement variable: {os.environ.get('ENV')}")
+                raise Exception(f"Unknown ENV environnement variable: {self.env}")
 
             identifiers = ['audio', 'text', 'video']
             responses = await self.__call_apis(urls, identifiers)
+            updates = []
             for response in responses:
                 try:
                     if response.status == 'ok':
                         column_name = response.identifier + '_ok'
                         print('Updating database boolean for {}'.format(column_name))
-                        self.utils.update_bool_db(column_name, True)
+                        updates.append(asyncio.to_thread(self.utils.update_bool_db, column_name, True))
                     else:
                         self.utils.log.error('Error from {}: {}'.format(response.identifier, response.content))
                 except Exception as e:
                     self.utils.log.error('An error occurred: {}'.format(e))
                     print('An error occurred: {}'.format(e))
 
-            self.utils.update_bool_db('inference_ok', True)
+            # The database updates are blocking calls, run them together in worker threads
+            await asyncio.gather(*updates)
+            await asyncio.to_thread(self.utils.update_bool_db, 'inference_ok', True)
             self.utils.log.info('Sentiment detection from text, audio and video have finished')
             self.utils.log.info('Program finished successfully')
             print('Program finished successfully')
@@ -280,6 +459,5 @@ class Process:
             raise HTTPException(status_code=500, detail=str(e))
         finally:
             print('Saving log files')
-            self.utils.end_logs('inference')
-            self.utils.__del__()
+            await asyncio.to_thread(self.utils.end_logs, 'inference')
             print('Program finished')
@@ -1,13 +1,44 @@
+import io
 import os
 import sys
+import gzip
 import logging
+import threading
+import tempfile
 import configparser
+import orjson
 import pandas as pd
-from typing import Any
+from typing import Any, Dict
 from datetime import datetime
 from supabase import create_client, Client
 
 
+def _load_config() -> Dict[str, Dict[str, str]]:
+    """
+    Loads the configuration settings from the 'config.ini' file. The file is parsed once, when the module is imported,
+    into plain dictionaries so that reading a setting is a simple dictionary lookup.
+    Returns:
+        Dict[str, Dict[str, str]]: The settings of each section of 'config.ini', with the keys' case preserved.
+    Raises:
+        IOError: If 'config.ini' is not found, raises an IOError and halts the program, indicating the dependency
+                 on this configuration file for the application's operation.
+    """
+    config = configparser.ConfigParser()
+    config.optionxform = str
+    try:
+        base_path = os.path.dirname(os.path.dirname(__file__))
+        path = os.path.join(base_path, 'config', 'config.ini')
+        with open(path) as f:
+            config.read_file(f)
+    except IOError as e:
+        print("No file 'config.ini' is present, the program can not continue")
+        raise e
+    return {section: dict(config[section]) for section in config.sections()}
+
+
+_CONFIG = _load_config()
+
+
 # Create custom stream handler
 class LoggerWriter:
     """
@@ -45,7 +76,7 @@ class BufferingHandler(logging.Handler):
     Custom logging handler that buffers log records in memory. This handler is useful for situations where
     logs need to be accumulated and processed in bulk rather than being written out individually.
     Attributes:
-        buffer (list): A list to hold formatted log records.
+        buffer (io.StringIO): An in-memory text stream holding the formatted log records, one per line.
         filename (str): The name of the log file for which this handler is created.
     """
     def __init__(self, filename: str) -> None:
@@ -55,7 +86,7 @@ class BufferingHandler(logging.Handler):
             filename (str): The name of the log file associated with this handler.
         """
         super().__init__()
-        self.buffer = []
+        self.buffer = io.StringIO()
         self.filename = filename
 
     def emit(self, record: logging.LogRecord) -> None:
@@ -65,32 +96,30 @@ class BufferingHandler(logging.Handler):
             record (logging.LogRecord): The log record to be processed and added to the buffer.
         """
         # Append the log record to the buffer
-        self.buffer.append(self.format(record))
+        self.buffer.write(self.format(record))
+        self.buffer.write('\n')
 
     def flush(self) -> str:
         """
-        Flushes the buffer by joining all buffered log records into a single string. Clears the buffer afterward.
+        Flushes the buffer by returning all buffered log records as a single string. Clears the buffer afterward.
         Returns:
             str: A single string containing all buffered log records separated by newlines.
                   Returns an empty string if the buffer is empty.
         """
-        if len(self.buffer) > 0:
-            return '\n'.join(self.buffer)
-        else:
-            return ''
+        with self.lock:
+            log = self.buffer.getvalue()
+            self.buffer = io.StringIO()
+        return log.rstrip('\n')
 
 
 class Utils:
     """
     Provides utility functions and classes for logging, configuration management, and interaction with cloud storage.
+    The Supabase client and the bucket connection are created once per process and shared by every instance.
     """
-    _instance = None
-
-    def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance.__initialized = False
-        return cls._instance
+    _client = None
+    _connection = None
+    _lock = threading.RLock()
 
     def __init__(self, session_id: int = None, interview_id: int = None) -> None:
         """
@@ -98,43 +127,64 @@ class Utils:
             session_id (int)
             interview_id (int)
         Functionality:
-            Initializes logging, configuration, and database client (supabase_client).
+            Initializes logging, and gets the configuration and the shared database client (supabase_client).
         """
-        if not self.__initialized:
-            self.config = self.__get_config()
+        self.config = _CONFIG
 
-            self.session_id = session_id
-            self.interview_id = interview_id
+        self.session_id = session_id
+        self.interview_id = interview_id
 
-            # S3 Folders
-            self.bucket_name = self.config['SUPABASE']['InputBucket']
-            self.output_s3_folder = '{}/{}/output'.format(self.session_id, self.interview_id)
+        # S3 Folders
+        self.bucket_name = self.config['SUPABASE']['InputBucket']
+        self.output_s3_folder = '{}/{}/output'.format(self.session_id, self.interview_id)
 
-            # Create loggers
-            self.log = self.__init_logs()
-            self.log.propagate = False
+        # Create loggers
+        self.log = self.__init_logs()
+        self.log.propagate = False
 
-            self.supabase_client = self.__check_supabase_connection()
-            self.supabase_connection = self.__connect_to_bucket()
-            self.supabase: Client = create_client(self.config['SUPABASE']['Url'], os.environ.get('SUPABASE_KEY'))
+        self.supabase: Client = self._get_client(self.log)
+        self.supabase_client = self.supabase
+        self.supabase_connection = self._get_connection(self.log)
 
-            self.__initialized = True
+    @classmethod
+    def _get_client(cls, log: logging.Logger) -> Client:
+        """
+        Returns the Supabase client, connecting on first use.
+        Parameters:
+            log (logging.Logger): The logger of the instance asking for the client.
+        """
+        with cls._lock:
+            if cls._client is None:
+                cls._client = cls.__check_supabase_connection(_CONFIG, log)
+        return cls._client
 
-    def __del__(self):
-        self.__initialized = False
+    @classmethod
+    def _get_connection(cls, log: logging.Logger) -> Any:
+        """
+        Returns the connection to the S3 bucket, checking it on first use.
+        Parameters:
+            log (logging.Logger): The logger of the instance asking for the connection.
+        """
+        with cls._lock:
+            if cls._connection is None:
+                cls._connection = cls.__connect_to_bucket(cls._get_client(log), _CONFIG['SUPABASE']['InputBucket'],
+                                                          log)
+        return cls._connection
 
     def __init_logs(self) -> logging.Logger:
         """
         Initializes and configures logging for the application. This method sets up separate log handlers
         for INFO and ERROR level messages to ensure logs are captured appropriately.
         Returns:
-            logging.Logger: The configured root logger with handlers for INFO and ERROR logs.
+            logging.Logger: The logger of this instance, with handlers for INFO and ERROR logs.
         Functionality:
             - Sets logging level to INFO for general logs.
             - Configures formatters to include timestamp, log level, and message details.
             - Creates separate file handlers for INFO and ERROR logs with buffering capabilities.
         """
-        root_logger = logging.getLogger('mainLog')
+        # Jobs run concurrently, so each instance gets its own logger. It is created directly rather than through
+        # logging.getLogger so that two jobs on the same interview do not share it and it is not kept once the job ends
+        root_logger = logging.Logger('mainLog.{}.{}'.format(self.session_id, self.interview_id))
         root_logger.setLevel(logging.INFO)
 
         # Configure basic logging settings
@@ -147,6 +197,8 @@ class Utils:
         info_handler = BufferingHandler(info_log)
         info_handler.setLevel(logging.INFO)
         info_handler.setFormatter(formatter)
+        # Errors go to the ERROR handler only, so they are not written twice in the combined log file
+        info_handler.addFilter(lambda record: record.levelno < logging.ERROR)
 
         # Create a file handler for ERROR messages
         error_log = 'errorLog_{}'.format(datetime.now().strftime('%Y_%m_%d_%H.%M.%S'))
@@ -154,8 +206,6 @@ class Utils:
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(formatter)
 
-        root_logger.handlers.clear()
-
         # Add the handlers to the root logger
         root_logger.addHandler(info_handler)
         root_logger.addHandler(error_handler)
@@ -163,54 +213,50 @@ class Utils:
         root_logger.encoding = encoding
         return root_logger
 
-    def __get_config(self) -> configparser.ConfigParser:
-        """
-        Loads and returns the configuration settings from a 'config.ini' file. This method ensures that the application
-        configuration is centrally managed and easily accessible.
-        Returns:
-            configparser.ConfigParser: A configuration parser object loaded with settings from 'config.ini'.
-        Raises:
-            IOError: If 'config.ini' is not found, raises an IOError and halts the program, indicating the dependency
-                     on this configuration file for the application's operation.
-        """
-        config = configparser.ConfigParser()
-        if len(config.sections()) == 0:
-            try:
-                base_path = os.path.dirname(os.path.dirname(__file__))
-                path = os.path.join(base_path, 'config', 'config.ini')
-                with open(path) as f:
-                    config.read_file(f)
-            except IOError as e:
-                print("No file 'config.ini' is present, the program can not continue")
-                raise e
-        return config
-
     def end_logs(self, name) -> None:
         """
         Functionality:
-            Flushes buffered logs to a file and uploads it to S3.
+            Flushes the buffered logs of every handler of the instance's logger into a single file and uploads it to S3.
+            The file is gzip-compressed when it is larger than LOGS.CompressAbove bytes.
             Ends logging for the session.
         """
-        log_handlers = logging.getLogger('mainLog').handlers[:]
-        for handler in log_handlers:
+        logs = []
+        for handler in self.log.handlers[:]:
             if isinstance(handler, BufferingHandler):
                 log = handler.flush()
                 if log:
-                    s3_path = '{}/{}/logs/{}_{}'.format(self.session_id, self.interview_id, name, handler.filename)
-                    try:
-                        self.supabase_connection.upload(file=log.encode(),
-                                                        path=s3_path,
-                                                        file_options={'content-type': 'text/plain'}
-                                                        )
-                        self.log.info('Log file {}_{} uploaded to S3 bucket'.format(name, handler.filename))
-                    except Exception as e:
-                        self.log.error('Error uploading the file {}_{} to the S3 bucket : {}.'.
-                                       format(name, handler.filename, str(e)))
-            logging.getLogger('mainLog').removeHandler(handler)
-
-    def __check_supabase_connection(self) -> Client:
+                    logs.append((handler.filename, log))
+            self.log.removeHandler(handler)
+
+        if not logs:
+            return
+
+        # One upload per session, each handler's records under its own header
+        filename = '{}_{}'.format(name, logs[0][0])
+        content = '\n\n'.join('=== {} ===\n{}'.format(handler_name, log) for handler_name, log in logs).encode()
+        content_type = 'text/plain'
+        if len(content) > int(self.config['LOGS']['CompressAbove']):
+            content = gzip.compress(content)
+            filename += '.gz'
+            content_type = 'application/gzip'
+
+        s3_path = '{}/{}/logs/{}'.format(self.session_id, self.interview_id, filename)
+        try:
+            self.supabase_connection.upload(file=content,
+                                            path=s3_path,
+                                            file_options={'content-type': content_type}
+                                            )
+            self.log.info('Log file {} uploaded to S3 bucket'.format(filename))
+        except Exception as e:
+            self.log.error('Error uploading the file {} to the S3 bucket : {}.'.format(filename, str(e)))
+
+    @staticmethod
+    def __check_supabase_connection(config: Dict[str, Dict[str, str]], log: logging.Logger) -> Client:
         """
         Attempts to establish a connection with the Supabase client using the application's configuration settings.
+        Parameters:
+            config (Dict[str, Dict[str, str]]): The application's configuration.
+            log (logging.Logger): The logger receiving the connection errors.
         Returns:
             Client: The connected Supabase client if the connection is successful.
         Raises:
@@ -219,57 +265,101 @@ class Utils:
                        established, as the connection is critical for the application's functionality.
         """
         try:
-            client = create_client(self.config['SUPABASE']['Url'], os.environ.get('SUPABASE_KEY'))
+            client = create_client(config['SUPABASE']['Url'], os.environ.get('SUPABASE_KEY'))
         except Exception as e:
             message = ('Error connecting to Supabase, the program can not continue.', str(e))
-            self.log.error(message)
+            log.error(message)
             print(message)
             sys.exit(1)
         return client
 
-    def __connect_to_bucket(self) -> Any:
+    @staticmethod
+    def __connect_to_bucket(client: Client, bucket_name: str, log: logging.Logger) -> Any:
         """
         Establishes and returns a connection to a designated S3 bucket using the Supabase client.
         This method is essential for managing file storage operations within the application.
+        Parameters:
+            client (Client): The connected Supabase client.
+            bucket_name (str): The name of the S3 bucket.
+            log (logging.Logger): The logger receiving the connection messages.
         Returns:
             Any: The connection object to the designated S3 bucket if the connection is successful.
         Raises:
             Exception: Logs an error and terminates the application if the connection to the S3 bucket fails.
                        This ensures that the application does not continue without necessary storage capabilities.
         """
-        connection = self.supabase_client.storage.from_(self.bucket_name)
+        connection = client.storage.from_(bucket_name)
         try:
             connection.list()
-            self.log.info('Connection to S3 bucket {} successful'.format(self.bucket_name))
+            log.info('Connection to S3 bucket {} successful'.format(bucket_name))
         except Exception as e:
             message = ('Error connecting to S3 bucket {}, the program can not continue.'.
-                       format(self.bucket_name), str(e))
-            self.log.error(message)
+                       format(bucket_name), str(e))
+            log.error(message)
             print(message)
             sys.exit(1)
         return connection
 
-    def open_input_file(self, s3_path: str, file_name: str) -> bytes | None:
+    def open_input_file_to_tempfile(self, s3_path: str, file_name: str) -> str:
         """
-        Opens and reads a file from S3 storage.
+        Downloads a file from S3 storage into a temporary file on disk, so it does not have to be kept in memory.
         Parameters:
             s3_path (str): Path in the S3 bucket where the file is stored.
             file_name (str): Name of the file to be retrieved.
         Returns:
-            bytes | None: The content of the file as bytes, or None if an error occurs.
+            str: Path of the temporary file, which the caller is responsible for deleting.
         Raises:
             Exception: Logs and raises an exception if file retrieval fails.
         """
+        self.log.info('Getting file {} from the S3 bucket'.format(file_name))
+        f = tempfile.NamedTemporaryFile(suffix=os.path.splitext(file_name)[1], delete=False)
         try:
-            self.log.info('Getting file {} from the S3 bucket'.format(file_name))
-            file_bytes = self.supabase_connection.download(s3_path)
-            return file_bytes
+            with f:
+                f.write(self.supabase_connection.download(s3_path))
+            return f.name
         except Exception as e:
+            # The temporary file is not deleted automatically, do not leave it behind when the download fails
+            os.remove(f.name)
             message = ('Error downloading the file {} from the S3 bucket. '.
                        format(file_name), str(e))
             self.log.error(message)
             raise e
 
+    def load_cached_results(self, key: str) -> pd.DataFrame | None:
+        """
+        Gets the diarization and speech-to-text results cached in the S3 bucket for an audio file.
+        Parameters:
+            key (str): The cache key of the audio file.
+        Returns:
+            pd.DataFrame | None: The cached results, or None if the audio file has not been processed before.
+        """
+        s3_path = '{}/{}.json'.format(self.config['FOLDERS']['Cache'], key)
+        try:
+            records = orjson.loads(self.supabase_connection.download(s3_path))
+        except Exception:
+            self.log.info('No cached results for the audio file')
+            return None
+        self.log.info('Cached results found for the audio file')
+        return pd.DataFrame(records)
+
+    def save_cached_results(self, key: str, results: pd.DataFrame) -> None:
+        """
+        Caches the diarization and speech-to-text results of an audio file in the S3 bucket.
+        A failure is logged but does not stop the processing.
+        Parameters:
+            key (str): The cache key of the audio file.
+            results (pd.DataFrame): The results to cache.
+        """
+        s3_path = '{}/{}.json'.format(self.config['FOLDERS']['Cache'], key)
+        try:
+            self.supabase_connection.upload(file=results.to_json(orient='records').encode(),
+                                            path=s3_path,
+                                            file_options={'content-type': 'application/json'}
+                                            )
+            self.log.info('Results cached in the S3 bucket')
+        except Exception as e:
+            self.log.error('Error caching the results in the S3 bucket : {}.'.format(str(e)))
+
     def update_bool_db(self, champ_name: str, value: bool) -> None:
         """
         Updates a boolean value in the database for a given field name.
@@ -289,7 +379,8 @@ class Utils:
 
     def save_results_to_bd(self, results: pd.DataFrame) -> None:
         """
-        Save the results to the Supabase database.
+        Save the results to the Supabase database, inserting them in batches of InsertBatchSize rows.
+        The results previously saved for the interview are deleted first, so a new run does not duplicate them.
         Parameters:
             results (pd.DataFrame): The data to save to the database.
         Raises:
@@ -297,18 +388,29 @@ class Utils:
         """
         self.log.info('Saving results to the supabase database')
 
+        saved = 0
         try:
-            response = self.supabase.table('interviews').select('user_id').eq('id', self.interview_id).execute()
-            user_id = response.data[0]['user_id']
+            response = (self.supabase.table('interviews').select('user_id').eq('id', self.interview_id)
+                        .single().execute())
+            user_id = response.data['user_id']
 
             results['interview_id'] = self.interview_id
             results['user_id'] = user_id
-            results = results.fillna('')
+            results.fillna('', inplace=True)
 
             data_to_insert = results.to_dict(orient='records')
 
-            response = self.supabase.table('results').insert(data_to_insert).execute()
-            self.log.info('{} lines saved to the database successfully'. format(len(response.data)))
+            # An interview can be processed again, its new results replace the previous ones instead of adding to them
+            self.supabase.table('results').delete().eq('interview_id', self.interview_id).execute()
+
+            # Large interviews are split so a single request does not exceed the API payload limits.
+            # The batches are not inserted atomically: if one fails, the previous ones stay in the database until the
+            # interview is processed again, which deletes them before inserting the full results
+            batch_size = int(self.config['SUPABASE']['InsertBatchSize'])
+            for i in range(0, len(data_to_insert), batch_size):
+                response = self.supabase.table('results').insert(data_to_insert[i:i + batch_size]).execute()
+                saved += len(response.data)
+            self.log.info('{} lines saved to the database successfully'. format(saved))
         except Exception as e:
-            self.log.error('Error saving results to the database', str(e))
+            self.log.error('Error saving results to the database after {} lines were saved: {}'.format(saved, e))
             raise e